@@ -1,9 +1,17 @@
+import asyncio
+import atexit
 import concurrent
-import json
 import os
+import struct
 from concurrent.futures.thread import ThreadPoolExecutor
 from datetime import datetime
-from threading import Lock
+from queue import Queue, SimpleQueue
+from threading import Event, Lock, Thread
+
+import aiohttp
+import orjson
+from bs4 import BeautifulSoup
+from pybloom_live import ScalableBloomFilter
 
 import play_scraper
 import play_scraper.settings
@@ -13,40 +21,173 @@ from play_scraper.scraper import PlayScraper
 scraper = PlayScraper()
 play_scraper.settings.CONCURRENT_REQUESTS = 20
 base_addr = "data"
+apps_dir = os.path.join(base_addr, 'apps')
+stats_dir = os.path.join(base_addr, 'stats')
+stats_flush_interval = 1000
+max_connections = 200
+write_buffer_size = 1 << 17
+file_writer = ThreadPoolExecutor(max_workers=8)
 
-stats_lock = Lock()
 stats = {
-    'details-checked': set(),
     'developers-not-checked': set(),
     'developers-checked': set(),
     'similars-checked': set(),
     'similars-not-checked': set(),
     'categories-checked': set(),
 }
+_stat_files = {}
+_stat_writes = dict.fromkeys(stats, 0)
+_stat_queue = SimpleQueue()
+
+# Saved apps run into the millions, so they are tracked in a Bloom filter rather than
+# an exact set. The filter is persisted, so a false positive means that app is
+# skipped on every future run too; the error rate keeps that to about 1 in 1000.
+details_seen_addr = f'{stats_dir}/details-checked.bloom'
+details_seen = ScalableBloomFilter(initial_capacity=1_000_000, error_rate=0.001)
+details_seen_lock = Lock()
+
+
+def _read_stat_file(addr):
+    try:
+        with open(addr, 'r') as d:
+            return d.read()
+    except FileNotFoundError:
+        log("file: {} not found!".format(addr))
+        return ''
 
 
 def load_stats():
     log('loading stats....')
-    for file in stats:
-        addr = os.path.join(base_addr, f'stats/{file}.txt')
-        try:
-            with open(addr, 'r+') as d:
-                stats[file] = set(d.read().split('\n'))
-        except:
-            log("file: {} not found!".format(addr))
+    addrs = [f'{stats_dir}/{kind}.txt' for kind in stats]
+    with ThreadPoolExecutor(max_workers=len(addrs)) as executor:
+        for kind, addr, content in zip(stats, addrs, executor.map(_read_stat_file, addrs)):
+            stats[kind] = set(filter(None, content.split('\n')))
+            _stat_files[kind] = open(addr, 'a', buffering=write_buffer_size)
+
+    load_details_seen()
+    _stat_writer.start()
     log("Done")
 
 
+def load_details_seen():
+    global details_seen
+    try:
+        with open(details_seen_addr, 'rb') as f:
+            details_seen = ScalableBloomFilter.fromfile(f)
+    except (FileNotFoundError, EOFError, struct.error, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            log("Corrupt {} ({}), rebuilding it".format(details_seen_addr, e))
+        # First run with the filter (or a broken one): carry over the old plain-text
+        # stats file; the scan below adds everything saved since
+        content = _read_stat_file(f'{stats_dir}/details-checked.txt')
+        for app_id in filter(None, content.split('\n')):
+            details_seen.add(app_id)
+
+    # The stats can lag behind what was actually saved; trust the app files too
+    with os.scandir(apps_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json'):
+                details_seen.add(entry.name[:-5])
+
+    # Only persist a filter that was actually loaded, never an empty placeholder
+    atexit.register(save_details_seen)
+
+
+def mark_details_seen(app_id):
+    with details_seen_lock:
+        details_seen.add(app_id)
+
+
+def filter_unseen(app_ids):
+    # ScalableBloomFilter grows by appending filters, so reads share the writers' lock
+    with details_seen_lock:
+        return [i for i in app_ids if i not in details_seen]
+
+
+def save_details_seen():
+    # Written aside and swapped in, so dying mid-write can't leave a truncated filter
+    tmp_addr = f'{details_seen_addr}.tmp'
+    with details_seen_lock:
+        with open(tmp_addr, 'wb') as f:
+            details_seen.tofile(f)
+    os.replace(tmp_addr, details_seen_addr)
+
+
 def set_stat(kind, info):
+    """
+    Records info in memory right away and leaves the disk write to the stat writer
+    thread. Two threads racing on the same info may both queue it; the duplicate
+    line is harmless and gone after the next rewrite.
+    """
     if info in stats[kind]:
         return
 
-    stats_lock.acquire()
     stats[kind].add(info)
-    addr = os.path.join(base_addr, f'stats/{kind}.txt')
-    with open(addr, 'w') as f:
-        f.write('\n'.join(stats[kind]))
-    stats_lock.release()
+    _stat_queue.put((kind, info))
+
+
+def _write_stats():
+    while True:
+        item = _stat_queue.get()
+        if item is None:
+            return
+
+        kind, info = item
+        try:
+            _stat_files[kind].write(info + '\n')
+            _stat_writes[kind] += 1
+            if _stat_writes[kind] >= stats_flush_interval:
+                _rewrite_stat_file(kind)
+        except Exception as e:
+            # Keep the writer alive; the next rewrite puts the file back in sync
+            log("Error writing stat {}: {}".format(kind, e))
+
+        # Buffer bursts, but don't leave anything unwritten once the writer goes idle:
+        # a killed process never runs the atexit rewrite
+        if _stat_queue.empty():
+            for stat_file in _stat_files.values():
+                try:
+                    stat_file.flush()
+                except Exception as e:
+                    log("Error flushing stat file {}: {}".format(stat_file.name, e))
+
+
+_stat_writer = Thread(target=_write_stats, daemon=True)
+
+
+def _rewrite_stat_file(kind):
+    # Workers add to and discard from the set without a lock. list() copies it in one
+    # C call, whereas iterating it in Python can raise "Set changed size".
+    snapshot = list(stats[kind])
+    addr = f'{stats_dir}/{kind}.txt'
+    tmp_addr = f'{addr}.tmp'
+    with open(tmp_addr, 'w', buffering=write_buffer_size) as f:
+        f.write(''.join(f'{info}\n' for info in snapshot))
+
+    _stat_files[kind].close()
+    os.replace(tmp_addr, addr)
+    _stat_files[kind] = open(addr, 'a', buffering=write_buffer_size)
+    _stat_writes[kind] = 0
+
+
+def flush_stats():
+    """
+    Waits for pending app file writes, stops the stat writer once it has drained the
+    queue, then rewrites every stat file from its in-memory set. set_stat only
+    appends, so this is what drops entries removed from a set (e.g.
+    similars-not-checked). Runs at exit.
+    """
+    file_writer.shutdown(wait=True)
+
+    if _stat_writer.is_alive():
+        _stat_queue.put(None)
+        _stat_writer.join()
+
+    for kind in _stat_files:
+        _rewrite_stat_file(kind)
+
+
+atexit.register(flush_stats)
 
 
 def remove_stat(kind, info):
@@ -55,7 +196,7 @@ def remove_stat(kind, info):
 
 
 def set_new_app_stats(app_info):
-    set_stat('details-checked', app_info['app_id'])
+    mark_details_seen(app_info['app_id'])
 
     if app_info['app_id'] not in stats['similars-checked']:
         set_stat('similars-not-checked', app_info['app_id'])
@@ -64,30 +205,120 @@ def set_new_app_stats(app_info):
         set_stat('developers-not-checked', app_info['developer_id'])
 
 
-def save_app_details(app_info):
-    addr = os.path.join(base_addr,f'apps/{app_info["app_id"]}.json')
+def write_app_details(app_info):
+    addr = f'{apps_dir}/{app_info["app_id"]}.json'
+    blob = orjson.dumps(app_info, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    with open(addr, 'wb') as app_file:
+        app_file.write(blob)
+
+
+def save_app_details_batch(app_infos):
+    """
+    Saves a batch of apps, writing the files concurrently on file_writer (file I/O
+    releases the GIL). Each app is serialized by the worker that writes it, so only
+    one blob per worker is alive at a time rather than one per app in the batch.
+    """
+    list(file_writer.map(write_app_details, app_infos))
+
+    for app_info in app_infos:
+        set_new_app_stats(app_info)
+
+
+async def fetch_app(session, app_id):
+    url = play_scraper.utils.build_url('details', app_id)
+    async with session.get(url) as response:
+        response.raise_for_status()
+        return app_id, await response.read(), str(response.url)
+
+
+def parse_app(app_id, body, url):
+    soup = BeautifulSoup(body, 'lxml', from_encoding='utf8')
+    app_json = play_scraper.utils.parse_app_details(soup)
+    app_json.update({'app_id': app_id, 'url': url})
+    return app_json
+
+
+async def _get_fetch_session():
+    # Only ever awaited on _fetch_loop, so there is no race creating the session
+    global _fetch_session
+    if _fetch_session is None:
+        _fetch_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max_connections),
+            timeout=aiohttp.ClientTimeout(sock_connect=30, sock_read=30),
+            headers=play_scraper.utils.default_headers(),
+        )
+    return _fetch_session
+
+
+async def gather_apps(app_ids):
+    """
+    Fetches the detail pages of all apps over the shared aiohttp session and returns
+    (app_id, body, url) for each. Its connector caps the whole crawler at
+    max_connections requests in flight, whichever thread asked for them, and keeps
+    connections alive between calls. Failed apps are logged and skipped.
+
+    These fetches don't go through play_scraper's HTTP cache. A restarted crawl
+    avoids refetching details because details_seen already holds the saved apps.
+    """
+    session = await _get_fetch_session()
+    results = await asyncio.gather(*[fetch_app(session, i) for i in app_ids], return_exceptions=True)
+
+    pages = []
+    for app_id, result in zip(app_ids, results):
+        if isinstance(result, Exception):
+            log("Error fetching {}: {}".format(app_id, result))
+        else:
+            pages.append(result)
+    return pages
+
+
+def fetch_apps(app_ids):
+    """
+    Runs gather_apps on the long-lived fetch loop and waits for the pages. Safe to
+    call from any worker thread. The pages are parsed here on the calling thread,
+    so the loop shared by all workers only ever does I/O.
+    """
+    pages = asyncio.run_coroutine_threadsafe(gather_apps(app_ids), _fetch_loop).result()
+
+    apps = []
+    for app_id, body, url in pages:
+        try:
+            apps.append(parse_app(app_id, body, url))
+        except Exception as e:
+            log("Error parsing {}: {}".format(app_id, e))
+    return apps
+
 
-    with open(addr, 'w', encoding='utf-8') as app_file:
-        info_json = json.dumps(app_info, indent=4, )
-        app_file.write(info_json)
+def close_fetch_loop():
+    if _fetch_session is not None:
+        asyncio.run_coroutine_threadsafe(_fetch_session.close(), _fetch_loop).result()
+    _fetch_loop.call_soon_threadsafe(_fetch_loop.stop)
 
-    set_new_app_stats(app_info)
 
+_fetch_loop = asyncio.new_event_loop()
+_fetch_session = None
+Thread(target=_fetch_loop.run_forever, daemon=True).start()
+atexit.register(close_fetch_loop)
 
-def get_and_save_app_details(app_ids):
-    not_exists = [i for i in app_ids if i not in stats['details-checked']]
-    app_details = play_scraper.utils.multi_futures_app_request(not_exists)
 
-    for detail in app_details:
-        save_app_details(detail)
+def get_and_save_app_details(app_ids):
+    not_exists = filter_unseen(set(app_ids))
+    if not not_exists:
+        return []
+    app_details = fetch_apps(not_exists)
+    save_app_details_batch(app_details)
+    return app_details
 
 
-def get_and_save_similar(app_id):
+def get_and_save_similar(app_id, enqueue=None):
     try:
         similars = scraper.similar(app_id)
-        new_app_ids = [i['app_id'] for i in similars if i['app_id'] not in stats['details-checked']]
+        new_app_ids = filter_unseen([i['app_id'] for i in similars])
         log("New Apps for {}: {}({})".format(app_id, len(new_app_ids), len(similars)))
-        get_and_save_app_details(app_ids=new_app_ids)
+        app_details = get_and_save_app_details(app_ids=new_app_ids)
+        if enqueue is not None:
+            for detail in app_details:
+                enqueue(detail['app_id'])
     except Exception as e:
         log("Error: {}".format(str(e)))
 
@@ -95,8 +326,7 @@ def get_and_save_similar(app_id):
 def get_and_save_developer_apps(developer_id):
     set_stat("developers-checked", developer_id)
     apps_details = scraper.developer(developer=developer_id, results=120, detailed=True)
-    for detail in apps_details:
-        save_app_details(detail)
+    save_app_details_batch(apps_details)
 
 
 def get_category_apps(category):
@@ -140,22 +370,54 @@ def get_categories_apps():
                 log_stats()
 
 
+def check_similars(queue, stop):
+    while True:
+        app_id = queue.get()
+        if app_id is None:
+            return
+
+        try:
+            # Once stopped, drain what is left so the workers reach their sentinels
+            if stop.is_set() or app_id in stats['similars-checked']:
+                continue
+
+            get_and_save_similar(app_id, enqueue=queue.put)
+            set_stat('similars-checked', app_id)
+            stats['similars-not-checked'].discard(app_id)
+
+            log("Done: Similar Apps For: {}".format(app_id))
+            log_stats()
+        finally:
+            queue.task_done()
+
+
 def get_similar_apps():
-    while len(stats['similars-not-checked']):
-        with concurrent.futures.ThreadPoolExecutor(max_workers=play_scraper.settings.CONCURRENT_REQUESTS) as executor:
-            future_to_app_id = {
-                executor.submit(get_and_save_similar, app_id): app_id for app_id in stats['similars-not-checked']
-            }
-            for future in concurrent.futures.as_completed(future_to_app_id):
-                app_id = future_to_app_id[future]
-                try:
-                    set_stat('similars-checked', app_id)
-                    stats['similars-not-checked'].remove(app_id)
+    """
+    Workers take app ids off a shared queue and push the apps they discover back onto
+    it, so new similars are picked up right away. A worker enqueues what it finds
+    before marking its own id done, so queue.join() only returns once the queue is
+    empty and no worker is busy; then every worker is sent a stop sentinel.
+
+    If the wait is interrupted (e.g. Ctrl-C), the workers skip whatever is still
+    queued and get their sentinels too, so the executor can shut down and the
+    stats get flushed at exit.
+    """
+    queue = Queue()
+    stop = Event()
+    for app_id in list(stats['similars-not-checked']):
+        queue.put(app_id)
+
+    workers = play_scraper.settings.CONCURRENT_REQUESTS
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(workers):
+            executor.submit(check_similars, queue, stop)
 
-                    log("Done: Similar Apps For: {}".format(app_id))
-                    log_stats()
-                except Exception as exc:
-                    log('%r generated an exception: %s' % (app_id, exc))
+        try:
+            queue.join()
+        finally:
+            stop.set()
+            for _ in range(workers):
+                queue.put(None)
 
 
 def get_developers_apps():
@@ -173,7 +435,10 @@ def main():
 
 
 def log_stats():
-    log("Apps Stat: {}".format(" - ".join([f'{key}: {len(stats[key])}' for key in stats])))
+    with details_seen_lock:
+        seen_count = len(details_seen)
+    counts = [f'details-checked: {seen_count}'] + [f'{key}: {len(stats[key])}' for key in stats]
+    log("Apps Stat: {}".format(" - ".join(counts)))
 
 
 def log(text, end='\n'):
@@ -4,7 +4,7 @@ import logging
 
 try:
     from urllib import quote_plus
-    from urlparse import urljoin
+    from urlparse import urljoin, urlparse
 except ImportError:
     from urllib.parse import urljoin, quote_plus, urlparse, parse_qs
 try:
@@ -12,8 +12,9 @@ try:
 except NameError:
     basestring = str
 
-import requests
+import httpx
 from bs4 import BeautifulSoup
+from lxml.cssselect import CSSSelector
 
 from play_scraper import settings as s
 from play_scraper.constants import HL_LANGUAGE_CODES, GL_COUNTRY_CODES
@@ -25,6 +26,7 @@ from play_scraper.utils import (
     parse_app_details,
     parse_card_info,
     parse_cluster_card_info,
+    parse_html,
     send_request, build_cluster_url, build_category_url, get_query_params,
 )
 
@@ -46,6 +48,7 @@ class PlayScraper(object):
         self.params = {"hl": self.language, "gl": self.geolocation}
 
         self._base_url = s.BASE_URL
+        self._origin = "{0.scheme}://{0.netloc}".format(urlparse(s.BASE_URL))
         self._suggestion_url = s.SUGGESTION_URL
         self._search_url = s.SEARCH_URL
         self._pagtok = s.PAGE_TOKENS
@@ -53,6 +56,20 @@ class PlayScraper(object):
         self.list_item_promo_selector = "div.vU6FJ.HPtqMb > div > div.b8cIId.ReQCgd.KdSQre.fmVS2c > a"
         self.list_item_selector = "div.ZmHEEd > div > c-wiz > div > div > div.uzcko > div > div > a"
 
+        # Selectors are compiled to XPath once here instead of on every call
+        self._xp_card = CSSSelector('div[data-uitype="500"]')
+        self._xp_vpf = CSSSelector("div.Vpfmgd")
+        self._xp_preview = CSSSelector("span.preview-overlay-container")
+        self._xp_p63 = CSSSelector("div.p63iDd > a")
+        self._xp_list_item = CSSSelector(self.list_item_selector)
+        self._xp_promo = CSSSelector(self.list_item_promo_selector)
+        self._xp_cluster = CSSSelector(
+            "c-wiz > c-wiz > div > div.Z3lOXb > div.xwY9Zc > a"
+        )
+        self._xp_cat = CSSSelector(
+            'div[id*="action-dropdown-children"] a[href*="category"]'
+        )
+
     def _parse_multiple_apps(self, list_response):
         """Extracts app ids from a list's Response object, sends GET requests to
         each app, parses detailed info and returns all apps in a list.
@@ -62,16 +79,14 @@ class PlayScraper(object):
         """
         # TODO: refactor to better handle multiple possible list HTMLs and selectors
         # to extract out app ids
-        soup = BeautifulSoup(list_response.content, "lxml", from_encoding="utf8")
+        tree = parse_html(list_response.content)
 
-        app_ids = [
-            x.attrs["data-docid"] for x in soup.select("span.preview-overlay-container")
-        ]
+        app_ids = [x.attrib["data-docid"] for x in self._xp_preview(tree)]
         if not app_ids:
-            app_ids = [
-                extract_id_query(x.attrs.get("href"))
-                for x in soup.select("div.p63iDd > a")
-            ]
+            app_ids = [extract_id_query(x.get("href")) for x in self._xp_p63(tree)]
+
+        # The same app can be listed more than once; only fetch it once
+        app_ids = list(dict.fromkeys(app_ids))
 
         return multi_futures_app_request(app_ids, params=self.params)
 
@@ -86,7 +101,7 @@ class PlayScraper(object):
         try:
             response = send_request("GET", url, params=self.params)
             soup = BeautifulSoup(response.content, "lxml", from_encoding="utf8")
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             raise ValueError(
                 "Invalid application ID: {app}. {error}".format(app=app_id, error=e)
             )
@@ -126,10 +141,8 @@ class PlayScraper(object):
         if detailed:
             apps = self._parse_multiple_apps(response)
         else:
-            soup = BeautifulSoup(response.content, "lxml", from_encoding="utf8")
-            apps = [
-                parse_card_info(app) for app in soup.select('div[data-uitype="500"]')
-            ]
+            tree = parse_html(response.content)
+            apps = list(map(parse_card_info, self._xp_card(tree)))
 
         return apps
 
@@ -170,12 +183,12 @@ class PlayScraper(object):
         self.params.update({"q": quote_plus(query), "c": "apps"})
 
         response = send_request("POST", self._search_url, data, self.params)
-        soup = BeautifulSoup(response.content, "lxml", from_encoding="utf8")
 
         if detailed:
             apps = self._parse_multiple_apps(response)
         else:
-            apps = [parse_cluster_card_info(app) for app in soup.select("div.Vpfmgd")]
+            tree = parse_html(response.content)
+            apps = list(map(parse_cluster_card_info, self._xp_vpf(tree)))
 
         return apps
 
@@ -189,12 +202,12 @@ class PlayScraper(object):
         """
         url = build_url("similar", app_id)
         response = send_request("GET", url, params=self.params, allow_redirects=True)
-        soup = BeautifulSoup(response.content, "lxml", from_encoding="utf8")
 
         if detailed:
             apps = self._parse_multiple_apps(response)
         else:
-            apps = [parse_cluster_card_info(app) for app in soup.select("div.Vpfmgd")]
+            tree = parse_html(response.content)
+            apps = list(map(parse_cluster_card_info, self._xp_vpf(tree)))
 
         return apps
 
@@ -205,21 +218,24 @@ class PlayScraper(object):
         categories = {}
 
         response = send_request("GET", s.BASE_URL, params=self.params)
-        soup = BeautifulSoup(response.content, "lxml", from_encoding="utf8")
+        tree = parse_html(response.content)
 
-        category_links = soup.select(
-            'div[id*="action-dropdown-children"] a[href*="category"]'
-        )
+        category_links = self._xp_cat(tree)
         age_query = "?age="
 
         for cat in category_links:
-            url = urljoin(s.BASE_URL, cat.attrs["href"])
-            category_id = url.split("/")[-1]
-            name = cat.string.strip()
+            href = cat.attrib["href"]
+            # Links are almost always root-relative, which only need the origin
+            if href.startswith("/") and not href.startswith("//"):
+                url = self._origin + href
+            else:
+                url = urljoin(s.BASE_URL, href)
+            category_id = url.rpartition("/")[2]
+            name = cat.text_content().strip()
 
             if age_query in category_id:
                 category_id = "FAMILY"
-                url = url.split("?")[0]
+                url = url.partition("?")[0]
                 name = "Family"
 
             if category_id not in categories:
@@ -242,17 +258,16 @@ class PlayScraper(object):
         """
 
         clusters = {}
-        cluster_selector = "c-wiz > c-wiz > div > div.Z3lOXb > div.xwY9Zc > a"
 
         category_url = build_category_url(category=category)
         response = send_request("GET", category_url)
 
-        soup = BeautifulSoup(response.content, 'lxml', from_encoding='utf8')
-        cluster_elements = soup.select(cluster_selector)
+        tree = parse_html(response.content)
+        cluster_elements = self._xp_cluster(tree)
 
         for element in cluster_elements:
-            title = element.h2.text
-            gsr = get_query_params(element['href'])['gsr'][0]
+            title = element.find('.//h2').text_content()
+            gsr = get_query_params(element.attrib['href'])['gsr'][0]
 
             clusters[title] = gsr
 
@@ -268,13 +283,13 @@ class PlayScraper(object):
         cluster_url = build_cluster_url(gsr=gsr)
         response = send_request("GET", cluster_url)
 
-        soup = BeautifulSoup(response.content, 'lxml', from_encoding='utf8')
-        items_elements = soup.select(self.list_item_selector)
+        tree = parse_html(response.content)
+        items_elements = self._xp_list_item(tree)
 
         if not len(items_elements):
-            items_elements = soup.select(self.list_item_promo_selector)
+            items_elements = self._xp_promo(tree)
 
-        app_ids = [get_query_params(element['href'])['id'][0] for element in items_elements]
+        app_ids = [get_query_params(element.attrib['href'])['id'][0] for element in items_elements]
 
         if not detailed:
             return [{'app_id': app_id} for app_id in app_ids]
@@ -291,13 +306,13 @@ class PlayScraper(object):
         category_url = build_category_url(category)
         response = send_request("GET", category_url)
 
-        soup = BeautifulSoup(response.content, 'lxml', from_encoding='utf8')
-        items_elements = soup.select(self.list_item_selector)
+        tree = parse_html(response.content)
+        items_elements = self._xp_list_item(tree)
 
         if not len(items_elements):
-            items_elements = soup.select(self.list_item_promo_selector)
+            items_elements = self._xp_promo(tree)
 
-        app_ids = [get_query_params(element['href'])['id'][0] for element in items_elements]
+        app_ids = [get_query_params(element.attrib['href'])['id'][0] for element in items_elements]
 
         if not detailed:
             return [{'app_id': app_id} for app_id in app_ids]
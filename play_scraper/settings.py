@@ -5,6 +5,10 @@ SUGGESTION_URL = "https://market.android.com/suggest/SuggRequest"
 SEARCH_URL = "https://play.google.com/store/search"
 
 CONCURRENT_REQUESTS = 20
+
+# On-disk HTTP response cache, so re-runs don't refetch unchanged pages
+HTTP_CACHE_NAME = ".http_cache"
+HTTP_CACHE_EXPIRE = 86400
 USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_5) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -2,6 +2,9 @@
 
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
 
 try:
     from urllib import quote_plus
@@ -9,15 +12,52 @@ try:
 except ImportError:
     from urllib.parse import quote_plus, urljoin, urlparse, parse_qs
 
-import requests
+import hishel
+import httpx
+import lxml.html
 from bs4 import BeautifulSoup
-from requests_futures.sessions import FuturesSession
+from lxml.cssselect import CSSSelector
 
 from play_scraper import settings as s
 
 log = logging.getLogger(__name__)
 
 
+_clients = {}
+_http_lock = Lock()
+
+
+def build_client(verify=True):
+    """Creates the HTTP/2 httpx Client behind every request the package
+    sends. Concurrent requests to the store are multiplexed over a few pooled
+    connections, and GET responses are cached on disk for
+    settings.HTTP_CACHE_EXPIRE seconds.
+
+    :param verify: a bool for requesting SSL verification.
+    :return: a caching httpx Client.
+    """
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    transport = httpx.HTTPTransport(http2=True, limits=limits, verify=verify, retries=3)
+    storage = hishel.FileStorage(base_path=Path(s.HTTP_CACHE_NAME), ttl=s.HTTP_CACHE_EXPIRE)
+    # Store pages ignore HTTP caching headers, so cache them unconditionally
+    controller = hishel.Controller(
+        cacheable_methods=["GET"], cacheable_status_codes=[200], force_cache=True
+    )
+    return hishel.CacheClient(transport=transport, storage=storage, controller=controller)
+
+
+def get_client(verify=True):
+    """Returns the shared httpx Client for the given verify setting, creating
+    it on first use."""
+    client = _clients.get(verify)
+    if client is None:
+        with _http_lock:
+            client = _clients.get(verify)
+            if client is None:
+                client = _clients[verify] = build_client(verify)
+    return client
+
+
 def default_headers():
     return {
         "Origin": "https://play.google.com",
@@ -105,6 +145,7 @@ def send_request(
         timeout=30,
         verify=True,
         allow_redirects=False,
+        no_cache=False,
 ):
     """Sends a request to the url and returns the response.
 
@@ -114,7 +155,8 @@ def send_request(
     :param headers: Dictionary of headers to include.
     :param timeout: number of seconds before timing out the request
     :param verify: a bool for requesting SSL verification.
-    :return: a Response object.
+    :param no_cache: if True, checks with the server instead of trusting the cache.
+    :return: an httpx Response object.
     """
     data = {} if data is None else data
     params = {} if params is None else params
@@ -122,26 +164,37 @@ def send_request(
     if not data and method == "POST":
         data = generate_post_data()
 
+    client = get_client(verify)
     try:
-        response = requests.request(
+        response = client.request(
             method=method,
             url=url,
             data=data,
             params=params,
             headers=headers,
             timeout=timeout,
-            verify=verify,
-            allow_redirects=allow_redirects,
+            follow_redirects=allow_redirects,
+            extensions={"force_cache": False, "cache_disabled": True} if no_cache else None,
         )
-        if not response.status_code == requests.codes.ok:
+        if response.is_error:
             response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         log.error(e)
         raise
 
     return response
 
 
+def parse_html(content):
+    """Parses a page's HTML into an lxml element tree.
+
+    :param content: the raw bytes of a Response
+    :return: the root lxml.html element
+    """
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    return lxml.html.fromstring(content, parser=parser)
+
+
 def parse_additional_info(soup):
     """Parses an app's additional information section on its detail page.
 
@@ -378,51 +431,74 @@ def extract_id_query(url):
     return app_id
 
 
-def parse_cluster_card_info(soup):
+def select_one(selector, element):
+    """Returns the first match of a compiled CSSSelector under an lxml element.
+
+    :param selector: a lxml.cssselect.CSSSelector
+    :param element: the lxml element to search in
+    :return: the first matching element, or None
+    """
+    matches = selector(element)
+    return matches[0] if matches else None
+
+
+_cluster_card_icon = CSSSelector("img")
+_cluster_card_details = CSSSelector("div.RZEgze")
+_cluster_card_link = CSSSelector("div.p63iDd > a")
+_cluster_card_title = CSSSelector("div.WsMG1c.nnK0zc")
+_cluster_card_developer = CSSSelector("a.mnKHRc")
+_cluster_card_developer_name = CSSSelector("div.KoLSrc")
+_cluster_card_description = CSSSelector("div.b8cIId.f5NCO")
+_cluster_card_score = CSSSelector("div.pf5lIe div")
+_cluster_card_price = CSSSelector("button span.VfPpfd")
+_cluster_card_full_price = CSSSelector("button span.SUZt4c")
+
+
+def parse_cluster_card_info(card):
     """
     App lists from GET requests follow a redirect to the /cluster page, which
     contains different HTML and selectors.
 
-    :param soup: a BeautifulSoup object of an app's card
+    :param card: an lxml element of an app's card
     :return: a dictionary of available basic app info
     """
-    icon = soup.select_one("img")
+    icon = select_one(_cluster_card_icon, card)
 
-    details_soup = soup.select_one("div.RZEgze")
-    relative_url = details_soup.select_one("div.p63iDd > a")
-    url = relative_url.attrs.get("href") if relative_url else None
+    details = select_one(_cluster_card_details, card)
+    relative_url = select_one(_cluster_card_link, details)
+    url = relative_url.get("href") if relative_url is not None else None
 
     app_id = None
     if url:
         app_id = extract_id_query(url)
 
-    title = details_soup.select_one("div.WsMG1c.nnK0zc")
+    title = select_one(_cluster_card_title, details)
 
-    developer_soup = details_soup.select_one("a.mnKHRc")
+    developer_link = select_one(_cluster_card_developer, details)
     developer = None
     developer_id = None
-    if developer_soup:
-        developer = developer_soup.select_one("div.KoLSrc")
-        developer_url = developer_soup.attrs.get("href") if developer else None
+    if developer_link is not None:
+        developer = select_one(_cluster_card_developer_name, developer_link)
+        developer_url = developer_link.get("href") if developer is not None else None
         developer_id = extract_id_query(developer_url)
 
-    description = details_soup.select_one("div.b8cIId.f5NCO")
+    description = select_one(_cluster_card_description, details)
 
-    score_soup = details_soup.select_one("div.pf5lIe div")
+    score_div = select_one(_cluster_card_score, details)
     score = None
-    if score_soup:
-        matches = re.search(r"([0-9]\.[0-9]) star", score_soup.text)
+    if score_div is not None:
+        matches = re.search(r"([0-9]\.[0-9]) star", score_div.text_content())
         score = matches.groups()[0] if matches else None
 
     price = None
-    price_button = details_soup.select_one("button span.VfPpfd")
-    if price_button:
-        price = price_button.text
+    price_button = select_one(_cluster_card_price, details)
+    if price_button is not None:
+        price = price_button.text_content()
 
     full_price = None
-    full_price_button = details_soup.select_one("button span.SUZt4c")
-    if full_price_button:
-        full_price = full_price_button.text
+    full_price_button = select_one(_cluster_card_full_price, details)
+    if full_price_button is not None:
+        full_price = full_price_button.text_content()
 
     free = price is None
     if free is True:
@@ -432,11 +508,11 @@ def parse_cluster_card_info(soup):
     return {
         "app_id": app_id,
         "url": url,
-        "icon": icon.attrs.get("data-src") if icon else None,
-        "title": title.text if title else None,
-        "developer": developer.text if developer else None,
+        "icon": icon.get("data-src") if icon is not None else None,
+        "title": title.text_content() if title is not None else None,
+        "developer": developer.text_content() if developer is not None else None,
         "developer_id": developer_id,
-        "description": description.text if description else None,
+        "description": description.text_content() if description is not None else None,
         "score": score,
         "full_price": full_price,
         "price": price,
@@ -444,38 +520,49 @@ def parse_cluster_card_info(soup):
     }
 
 
-def parse_card_info(soup):
+_card_link = CSSSelector("a.card-click-target")
+_card_icon = CSSSelector("img.cover-image")
+_card_title = CSSSelector("a.title")
+_card_developer = CSSSelector("a.subtitle")
+_card_description = CSSSelector("div.description")
+_card_score = CSSSelector("div.tiny-star")
+_card_display_price = CSSSelector("span.display-price")
+_card_price = CSSSelector("a.price")
+_card_full_price = CSSSelector("span.full-price")
+
+
+def parse_card_info(card):
     """Extracts basic app info from the app's card. Used when parsing pages
     with lists of apps.
 
-    :param soup: a BeautifulSoup object of an app's card
+    :param card: an lxml element of an app's card
     :return: a dictionary of available basic app info
     """
-    app_id = soup.attrs["data-docid"]
-    url = urljoin(s.BASE_URL, soup.select_one("a.card-click-target").attrs["href"])
+    app_id = card.attrib["data-docid"]
+    url = urljoin(s.BASE_URL, select_one(_card_link, card).attrib["href"])
     icon = urljoin(
-        s.BASE_URL, soup.select_one("img.cover-image").attrs["src"].split("=")[0]
+        s.BASE_URL, select_one(_card_icon, card).attrib["src"].split("=")[0]
     )
-    title = soup.select_one("a.title").attrs["title"]
+    title = select_one(_card_title, card).attrib["title"]
 
-    dev_soup = soup.select_one("a.subtitle")
-    developer = dev_soup.attrs["title"]
+    developer_link = select_one(_card_developer, card)
+    developer = developer_link.attrib["title"]
     try:
-        developer_id = dev_soup.attrs["href"].split("=")[1]
+        developer_id = developer_link.attrib["href"].split("=")[1]
     except IndexError:
         developer_id = None
 
-    description = soup.select_one("div.description").text.strip()
-    score = soup.select_one("div.tiny-star")
+    description = select_one(_card_description, card).text_content().strip()
+    score = select_one(_card_score, card)
     if score is not None:
-        score = score.attrs["aria-label"].strip().split(" ")[1]
+        score = score.attrib["aria-label"].strip().split(" ")[1]
 
     try:
-        price = soup.select_one("span.display-price").text
+        price = select_one(_card_display_price, card).text_content()
     except AttributeError:
         try:
             # Pre-register apps are 'Coming Soon'
-            price = soup.select_one("a.price").text
+            price = select_one(_card_price, card).text_content()
         except AttributeError:
             # Country restricted, no price or buttons shown
             price = None
@@ -483,7 +570,7 @@ def parse_card_info(soup):
     full_price = None
     if price is not None:
         try:
-            full_price = soup.select_one("span.full-price").text
+            full_price = select_one(_card_full_price, card).text_content()
         except AttributeError:
             full_price = None
 
@@ -506,16 +593,20 @@ def parse_card_info(soup):
     }
 
 
-def parse_app_details_response_hook(response, *args, **kwargs):
-    """
-    Requests futures hook function to asynchronously parse app details as the
-    responses are received. Mimics the `details` api.
+def request_app_details(app_id, headers=None, verify=True, params=None):
+    """Sends a GET request for an app's detail page and parses it. Mimics the
+    `details` api.
+
+    :param app_id: the app to retrieve details, e.g. 'com.nintendo.zaaa'
+    :return: a dictionary of app details
     """
-    if not response.status_code == requests.codes.ok:
-        response.raise_for_status()
+    url = build_url("details", app_id)
+    response = send_request("GET", url, params=params, headers=headers, verify=verify)
     soup = BeautifulSoup(response.content, "lxml", from_encoding="utf8")
-    details = parse_app_details(soup)
-    response.app_details_data = details
+
+    app_json = parse_app_details(soup)
+    app_json.update({"app_id": app_id, "url": str(response.url)})
+    return app_json
 
 
 def multi_futures_app_request(
@@ -527,32 +618,20 @@ def multi_futures_app_request(
     :param verify: bool for requesting SSL verification.
     :return: a list of all apps' detail data
     """
-    session = FuturesSession(max_workers=workers)
-
     headers = default_headers() if headers is None else headers
-    responses = [
-        session.get(
-            build_url("details", app_id),
-            headers=headers,
-            verify=verify,
-            params=params,
-            hooks={"response": parse_app_details_response_hook},
-        )
-        for app_id in app_ids
-    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(request_app_details, app_id, headers, verify, params)
+            for app_id in app_ids
+        ]
 
     apps = []
-    for i, response in enumerate(responses):
+    for app_id, future in zip(app_ids, futures):
         try:
-            result = response.result()
-            app_json = result.app_details_data
-            app_json.update({"app_id": app_ids[i], "url": result.url})
-            apps.append(response.result().app_details_data)
-        except requests.exceptions.RequestException as e:
+            apps.append(future.result())
+        except httpx.HTTPError as e:
             log.error(
-                "Error occurred fetching {app}: {err}".format(
-                    app=app_ids[i], err=str(e)
-                )
+                "Error occurred fetching {app}: {err}".format(app=app_id, err=str(e))
             )
 
     return apps
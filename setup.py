@@ -27,18 +27,18 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 2.7',
-        'Programming Language :: Python :: 3.2',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
     ],
+    python_requires='>=3.9',
     install_requires=[
         'beautifulsoup4>=4.6.1',
+        'cssselect>=1.0.0',
+        'hishel>=0.1.5,<1.0',
+        'httpx[http2]>=0.28.0',
         'lxml>=4.2.4',
-        'requests-futures>=0.9.7',
-        'requests[security]>=2.20.0',
     ],
 )
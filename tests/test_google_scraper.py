@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+from queue import Queue
+from unittest import mock
+
+import google_scraper
+
+
+class InterruptedQueue(Queue):
+    """Queue whose join() is interrupted once the crawl is under way."""
+
+    started = None
+
+    def join(self):
+        self.started.wait(timeout=5)
+        raise KeyboardInterrupt
+
+
+class TestGetSimilarApps(unittest.TestCase):
+    def setUp(self):
+        self.checked = []
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        patches = [
+            mock.patch.dict(google_scraper.stats, {
+                'similars-checked': set(),
+                'similars-not-checked': {'app0'},
+            }),
+            mock.patch.object(google_scraper, 'set_stat', self.set_stat),
+            mock.patch.object(google_scraper, 'log_stats', lambda: None),
+            mock.patch.object(google_scraper, 'log', lambda *args, **kwargs: None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def set_stat(self, kind, info):
+        google_scraper.stats[kind].add(info)
+
+    def run_crawl(self):
+        errors = []
+
+        def target():
+            try:
+                google_scraper.get_similar_apps()
+            except BaseException as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive(), "get_similar_apps did not return")
+        return errors
+
+    def test_stops_when_all_similars_are_checked(self):
+        def get_and_save_similar(app_id, enqueue=None):
+            with self.lock:
+                self.checked.append(app_id)
+            depth = int(app_id[3:])
+            if depth < 100:
+                enqueue(f'app{depth + 1}')
+
+        with mock.patch.object(google_scraper, 'get_and_save_similar', get_and_save_similar):
+            errors = self.run_crawl()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(self.checked), sorted(f'app{i}' for i in range(101)))
+        self.assertEqual(google_scraper.stats['similars-not-checked'], set())
+
+    def test_stops_when_interrupted(self):
+        def get_and_save_similar(app_id, enqueue=None):
+            # Every app leads to more apps, so only the interrupt can end the crawl
+            with self.lock:
+                self.checked.append(app_id)
+                count = len(self.checked)
+            self.started.set()
+            for i in range(3):
+                enqueue(f'{app_id}.{count}.{i}')
+
+        InterruptedQueue.started = self.started
+        with mock.patch.object(google_scraper, 'get_and_save_similar', get_and_save_similar), \
+                mock.patch.object(google_scraper, 'Queue', InterruptedQueue):
+            errors = self.run_crawl()
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], KeyboardInterrupt)
+        self.assertIn('app0', self.checked)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,9 @@ from play_scraper.utils import (
     build_url,
     build_collection_url,
     generate_post_data,
+    parse_card_info,
+    parse_cluster_card_info,
+    parse_html,
     send_request,
 )
 
@@ -107,3 +110,65 @@ class TestSendRequest(unittest.TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.url, expected_url)
+
+
+class TestParseCardInfo(unittest.TestCase):
+    def setUp(self):
+        self.card = parse_html(
+            b'<div data-uitype="500" data-docid="com.example.app">'
+            b'<a class="card-click-target" href="/store/apps/details?id=com.example.app"></a>'
+            b'<img class="cover-image" src="https://lh3.googleusercontent.com/abc=w170">'
+            b'<a class="title" title="Example">Example</a>'
+            b'<a class="subtitle" title="Example Inc" href="/store/apps/dev?id=123">Example Inc</a>'
+            b'<div class="description"> An example app </div>'
+            b'<div class="tiny-star" aria-label=" Rated 4.2 stars out of five stars "></div>'
+            b'<span class="display-price">$1.99</span>'
+            b"</div>"
+        )
+
+    def test_parse_card_info(self):
+        expected = {
+            "app_id": "com.example.app",
+            "url": "https://play.google.com/store/apps/details?id=com.example.app",
+            "icon": "https://lh3.googleusercontent.com/abc",
+            "title": "Example",
+            "developer": "Example Inc",
+            "developer_id": "123",
+            "description": "An example app",
+            "score": "4.2",
+            "full_price": None,
+            "price": "$1.99",
+            "free": False,
+        }
+        self.assertEqual(parse_card_info(self.card), expected)
+
+
+class TestParseClusterCardInfo(unittest.TestCase):
+    def setUp(self):
+        self.card = parse_html(
+            b'<div class="Vpfmgd"><img data-src="https://lh3.googleusercontent.com/abc">'
+            b'<div class="RZEgze">'
+            b'<div class="p63iDd"><a href="/store/apps/details?id=com.example.app"></a></div>'
+            b'<div class="WsMG1c nnK0zc">Example</div>'
+            b'<a class="mnKHRc" href="/store/apps/developer?id=Example+Inc">'
+            b'<div class="KoLSrc">Example Inc</div></a>'
+            b'<div class="b8cIId f5NCO">An example app</div>'
+            b'<div class="pf5lIe"><div>Rated 4.2 stars out of five stars</div></div>'
+            b"</div></div>"
+        )
+
+    def test_parse_free_cluster_card(self):
+        expected = {
+            "app_id": "com.example.app",
+            "url": "/store/apps/details?id=com.example.app",
+            "icon": "https://lh3.googleusercontent.com/abc",
+            "title": "Example",
+            "developer": "Example Inc",
+            "developer_id": "Example Inc",
+            "description": "An example app",
+            "score": "4.2",
+            "full_price": "0",
+            "price": "0",
+            "free": True,
+        }
+        self.assertEqual(parse_cluster_card_info(self.card), expected)